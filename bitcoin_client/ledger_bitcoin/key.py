@@ -25,6 +25,7 @@ import binascii
 import hmac
 import hashlib
 import struct
+from functools import lru_cache
 from typing import (
     Dict,
     List,
@@ -111,9 +112,20 @@ def lift_x(x: int) -> 'Point':
 
     return (x, p - y if y & 1 else y)
 
-def tagged_hash(tag: str, data: bytes) -> bytes:
+@lru_cache(maxsize=None)
+def _tagged_hash_midstate(tag: str) -> 'hashlib._Hash':
+    # hashtag||hashtag is exactly one SHA-256 block, so the hash state with the
+    # tag prefix absorbed can be computed once per tag and cheaply copied per call
     hashtag = hashlib.sha256(tag.encode()).digest()
-    return hashlib.sha256(hashtag + hashtag + data).digest()
+    midstate = hashlib.sha256()
+    midstate.update(hashtag + hashtag)
+    return midstate
+
+
+def tagged_hash(tag: str, data: bytes) -> bytes:
+    h = _tagged_hash_midstate(tag).copy()
+    h.update(data)
+    return h.digest()
 
 
 def taproot_tweak_pubkey(pubkey: bytes, h: bytes) -> Tuple[int, bytes]:
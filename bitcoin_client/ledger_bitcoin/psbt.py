@@ -178,8 +178,9 @@ class PartiallySignedInput:
             if len(key) == 0:
                 break
 
-            # First byte of key is the type
-            key_type = deser_compact_size(BytesIO(key))
+            # First byte of key is the type; only build a stream for the rare
+            # multi-byte compact size encodings
+            key_type = key[0] if key[0] < 253 else deser_compact_size(BytesIO(key))
 
             if key_type == PartiallySignedInput.PSBT_IN_NON_WITNESS_UTXO:
                 if key in key_lookup:
@@ -534,8 +535,9 @@ class PartiallySignedOutput:
             if len(key) == 0:
                 break
 
-            # First byte of key is the type
-            key_type = deser_compact_size(BytesIO(key))
+            # First byte of key is the type; only build a stream for the rare
+            # multi-byte compact size encodings
+            key_type = key[0] if key[0] < 253 else deser_compact_size(BytesIO(key))
 
             if key_type == PartiallySignedOutput.PSBT_OUT_REDEEM_SCRIPT:
                 if key in key_lookup:
@@ -702,13 +704,13 @@ class PSBT(object):
         self.version = 0
         self.explicit_version = False
 
-    def deserialize(self, psbt: str) -> None:
+    def deserialize(self, psbt: Union[bytes, str]) -> None:
         """
         Deserialize a base 64 encoded PSBT.
 
-        :param psbt: A base 64 PSBT.
+        :param psbt: A base 64 PSBT, or the binary-encoded psbt as `bytes`.
         """
-        psbt_bytes = base64.b64decode(psbt.strip())
+        psbt_bytes = base64.b64decode(psbt.strip()) if isinstance(psbt, str) else psbt
         f = BufferedReader(BytesIO(psbt_bytes)) # type: ignore
         end = len(psbt_bytes)
 
@@ -734,8 +736,9 @@ class PSBT(object):
             if len(key) == 0:
                 break
 
-            # First byte of key is the type
-            key_type = deser_compact_size(BytesIO(key))
+            # First byte of key is the type; only build a stream for the rare
+            # multi-byte compact size encodings
+            key_type = key[0] if key[0] < 253 else deser_compact_size(BytesIO(key))
 
             # Do stuff based on type
             if key_type == PSBT.PSBT_GLOBAL_UNSIGNED_TX:
@@ -1089,10 +1092,7 @@ def normalize_psbt(psbt: Union[PSBT, bytes, str]) -> PSBT:
     :param psbt: Either an instance of PSBT, or binary-encoded psbt as `bytes`, or a base64-encoded psbt as a `str`.
     :returns: the deserialized PSBT object. If `psbt` was already a `PSBT`, it is returned directly (without cloning).
     """
-    if isinstance(psbt, bytes):
-        psbt = base64.b64encode(psbt).decode()
-
-    if isinstance(psbt, str):
+    if isinstance(psbt, (bytes, str)):
         psbt_obj = PSBT()
         psbt_obj.deserialize(psbt)
         psbt = psbt_obj
@@ -1,7 +1,7 @@
 import re
 
 from enum import IntEnum
-from typing import List
+from typing import Dict, List, Tuple, Union
 
 from hashlib import sha256
 
@@ -53,6 +53,11 @@ class WalletPolicy(WalletPolicyBase):
         self.descriptor_template = descriptor_template
         self.keys_info = keys_info
 
+        # policies are immutable once constructed: the template is compiled once here,
+        # and the derived descriptors (one per value of change) are computed at most once
+        self._template_tokens = self._compile_template()
+        self._descriptor_cache: Dict[bool, str] = {}
+
     @property
     def n_keys(self) -> int:
         return len(self.keys_info)
@@ -70,20 +75,54 @@ class WalletPolicy(WalletPolicyBase):
             MerkleTree(keys_info_hashes).root
         ])
 
-    def get_descriptor(self, change: bool) -> str:
+    def _compile_template(self) -> List[Union[str, None, Tuple[str, str]]]:
+        """Pre-parses the descriptor template into a flat list of tokens, so that
+        get_descriptor only needs a single linear pass instead of re-parsing.
+
+        Tokens are literal strings, `None` for a /** derivation marker, or an (M, N)
+        pair for the /<M;N> multipath syntax (V2 only)."""
+
         desc = self.descriptor_template
         for i in reversed(range(self.n_keys)):
             key = self.keys_info[i]
             desc = desc.replace(f"@{i}", key)
 
-        # in V1, /** is part of the key; in V2, it's part of the policy map. This handles either
-        desc = desc.replace("/**", f"/{1 if change else 0}/*")
-
         if self.version == WalletType.WALLET_POLICY_V2:
-            # V2, the /<M;N> syntax is supported. Replace with M if not change, or with N if change
-            regex = r"/<(\d+);(\d+)>"
-            desc = re.sub(regex, "/\\2" if change else "/\\1", desc)
+            # in V2, the /<M;N> syntax is supported
+            regex = r"/\*\*|/<(\d+);(\d+)>"
+        else:
+            regex = r"/\*\*"
+
+        tokens: List[Union[str, None, Tuple[str, str]]] = []
+        pos = 0
+        for match in re.finditer(regex, desc):
+            if match.start() > pos:
+                tokens.append(desc[pos:match.start()])
+            # in V1, /** is part of the key; in V2, it's part of the policy map. This handles either
+            tokens.append(None if match.group() == "/**" else (match.group(1), match.group(2)))
+            pos = match.end()
+        if pos < len(desc):
+            tokens.append(desc[pos:])
 
+        return tokens
+
+    def get_descriptor(self, change: bool) -> str:
+        cached = self._descriptor_cache.get(change)
+        if cached is not None:
+            return cached
+
+        parts: List[str] = []
+        for token in self._template_tokens:
+            if isinstance(token, str):
+                parts.append(token)
+            elif token is None:
+                parts.append("/1/*" if change else "/0/*")
+            else:
+                # /<M;N>: replace with M if not change, or with N if change
+                parts.append("/" + (token[1] if change else token[0]))
+        desc = "".join(parts)
+
+        self._descriptor_cache[change] = desc
         return desc
 
 class MultisigWallet(WalletPolicy):
@@ -1,5 +1,6 @@
 import hashlib
-from typing import Literal, Union
+from functools import lru_cache
+from typing import Dict, Literal, Tuple, Union
 
 from mnemonic import Mnemonic
 from bip32 import BIP32
@@ -84,14 +85,27 @@ class SpeculosGlobals:
             WALLET_POLICY_SLIP21_LABEL).key
 
 
+@lru_cache(maxsize=128)
 def get_internal_xpub(seed: str, path: str) -> str:
+    # memoized, as tests repeatedly derive the same few paths and each hardened
+    # derivation step is an HMAC-SHA512 chain in pure Python
     bip32 = BIP32.from_seed(seed, network="test")
     return bip32.get_xpub_from_path(f"m/{path}") if path else bip32.get_xpub_from_path("m")
 
 
+_internal_key_count_cache: Dict[Tuple[str, str, bytes], int] = {}
+
+
 def count_internal_keys(seed: str, network: Union[Literal['main'], Literal['test']], wallet_policy: WalletPolicy) -> int:
     """Count how many of the keys in wallet_policy are indeed internal"""
 
+    # the result is a pure function of the seed and the policy; cache it by the policy id
+    # (which commits to the descriptor template and all the keys) to avoid re-deriving
+    cache_key = (seed, network, wallet_policy.id)
+    cached = _internal_key_count_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     bip32 = BIP32.from_seed(seed, network)
     master_key_fingerprint = hash160(bip32.pubkey)[0:4]
 
@@ -114,4 +128,5 @@ def count_internal_keys(seed: str, network: Union[Literal['main'], Literal['test
                     count += wallet_policy.descriptor_template.count(
                         f"@{key_index}/")
 
+    _internal_key_count_cache[cache_key] = count
     return count
@@ -2,6 +2,7 @@
 # https://github.com/bitcoin/bips/blob/master/bip-0340/reference.py
 
 
+from functools import lru_cache
 from typing import Tuple, Optional
 import hashlib
 
@@ -14,11 +15,19 @@ G = (0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798, 0x483AD
 
 Point = Tuple[int, int]
 
-# This implementation can be sped up by storing the midstate after hashing
-# tag_hash instead of rehashing it all the time.
-def tagged_hash(tag: str, msg: bytes) -> bytes:
+@lru_cache(maxsize=None)
+def _tagged_hash_midstate(tag: str) -> 'hashlib._Hash':
+    # tag_hash||tag_hash is exactly one SHA-256 block, so the hash state with the
+    # tag prefix absorbed can be computed once per tag and cheaply copied per call
     tag_hash = hashlib.sha256(tag.encode()).digest()
-    return hashlib.sha256(tag_hash + tag_hash + msg).digest()
+    midstate = hashlib.sha256()
+    midstate.update(tag_hash + tag_hash)
+    return midstate
+
+def tagged_hash(tag: str, msg: bytes) -> bytes:
+    h = _tagged_hash_midstate(tag).copy()
+    h.update(msg)
+    return h.digest()
 
 def is_infinite(P: Optional[Point]) -> bool:
     return P is None
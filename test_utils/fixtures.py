@@ -34,6 +34,15 @@ ASSIGNMENT_RE = re.compile(
     r'^\s*([a-zA-Z_][a-zA-Z_0-9]*)\s*=\s*(.*)$', re.MULTILINE)
 
 
+def get_worker_index() -> int:
+    """Index of the current pytest-xdist worker; 0 when not running under xdist.
+
+    Used to give each worker its own bitcoind datadir/ports and speculos API port,
+    so that independent tests can run in parallel."""
+    worker = os.getenv("PYTEST_XDIST_WORKER", "")
+    return int(worker[2:]) if worker.startswith("gw") else 0
+
+
 def get_app_version() -> str:
     makefile_path = repo_root_path / "Makefile"
     if not makefile_path.is_file():
@@ -127,11 +136,16 @@ def comm(settings, root_directory, hid, headless, model, app_version: str) -> Un
         else:
             lib_params = []
 
+        # each xdist worker gets its own speculos instance on a dedicated API port
+        api_port = 5000 + get_worker_index()
+
         client = SpeculosClient(
             app_binary,
             ['--model', model, '--seed', f'{settings["mnemonic"]}']
             + ["--display", "qt" if not headless else "headless"]
-            + lib_params
+            + ["--api-port", str(api_port)]
+            + lib_params,
+            api_url=f"http://127.0.0.1:{api_port}"
         )
         client.start()
 
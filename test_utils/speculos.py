@@ -1,4 +1,5 @@
 from contextlib import contextmanager
+from functools import lru_cache
 import json
 from typing import Union
 
@@ -6,6 +7,14 @@ from bitcoin_client.ledger_bitcoin.client_base import TransportClient
 from speculos.client import SpeculosClient
 
 
+@lru_cache(maxsize=None)
+def _load_automation_file(path: str) -> dict:
+    aut_obj = json.load(open(path))
+    if not isinstance(aut_obj, dict):
+        raise ValueError("Invalid automation file")
+    return aut_obj
+
+
 @contextmanager
 def automation(client: Union[TransportClient, SpeculosClient], file_or_automation: Union[str, dict]):
     if not isinstance(client, SpeculosClient):
@@ -13,9 +22,7 @@ def automation(client: Union[TransportClient, SpeculosClient], file_or_automatio
         yield
     else:
         if isinstance(file_or_automation, str):
-            aut_obj = json.load(open(file_or_automation))
-            if not isinstance(aut_obj, dict):
-                raise ValueError("Invalid automation file")
+            aut_obj = _load_automation_file(file_or_automation)
         else:
             aut_obj = file_or_automation
 
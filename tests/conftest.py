@@ -1,5 +1,6 @@
 import random
-from typing import Tuple
+from functools import lru_cache
+from typing import Dict, List, Tuple
 
 from test_utils.fixtures import *
 from test_utils.authproxy import AuthServiceProxy, JSONRPCException
@@ -7,11 +8,15 @@ from test_utils import segwit_addr
 
 import shutil
 import subprocess
-from time import sleep
+import threading
+from time import sleep, time
 from decimal import Decimal
 
 import bitcoin_client.ledger_bitcoin._base58 as base58
+from bitcoin_client.ledger_bitcoin._serialize import ser_string
 from bitcoin_client.ledger_bitcoin.common import sha256
+from bitcoin_client.ledger_bitcoin.descriptor import AddChecksum
+from bitcoin_client.ledger_bitcoin.key import ExtendedKey, tagged_hash, taproot_tweak_pubkey
 
 random.seed(0)  # make sure tests are repeatable
 
@@ -20,26 +25,47 @@ random.seed(0)  # make sure tests are repeatable
 os.environ['SPECULOS_APPNAME'] = f'Bitcoin Test:{get_app_version()}'
 
 
-BITCOIN_DIRNAME = os.getenv("BITCOIN_DIRNAME", ".test_bitcoin")
+# When running under pytest-xdist, each worker runs its own bitcoind with a separate
+# datadir and ports, so that independent tests can run in parallel.
+worker_index = get_worker_index()
 
+BITCOIN_DIRNAME = os.getenv("BITCOIN_DIRNAME", ".test_bitcoin") + (f"-{worker_index}" if worker_index else "")
+
+# two consecutive ports per worker (rpc and p2p)
+btc_rpc_port = int(os.getenv("BTC_RPC_PORT", "18443")) + 2 * worker_index
+btc_p2p_port = btc_rpc_port + 1
 
 rpc_url = "http://%s:%s@%s:%s" % (
     os.getenv("BTC_RPC_USER", "user"),
     os.getenv("BTC_RPC_PASSWORD", "passwd"),
     os.getenv("BTC_RPC_HOST", "127.0.0.1"),
-    os.getenv("BTC_RPC_PORT", "18443")
+    btc_rpc_port
 )
 
 utxos = list()
 btc_addr = ""
 
 
+# One proxy per URL, so that the underlying HTTP connection persists across calls and
+# tests instead of paying a TCP handshake per RPC.
+#
+# The node-level proxy never returns amounts that tests compare, so it can parse JSON
+# floats as plain floats (enabling the fast orjson path in AuthServiceProxy); wallet
+# proxies keep the Decimal default, as tests compare listunspent amounts exactly.
+_rpc_proxy_cache: Dict[str, AuthServiceProxy] = {}
+
+
 def get_rpc() -> AuthServiceProxy:
-    return AuthServiceProxy(rpc_url)
+    if rpc_url not in _rpc_proxy_cache:
+        _rpc_proxy_cache[rpc_url] = AuthServiceProxy(rpc_url, parse_float=float)
+    return _rpc_proxy_cache[rpc_url]
 
 
 def get_wallet_rpc(wallet_name: str) -> AuthServiceProxy:
-    return AuthServiceProxy(f"{rpc_url}/wallet/{wallet_name}")
+    url = f"{rpc_url}/wallet/{wallet_name}"
+    if url not in _rpc_proxy_cache:
+        _rpc_proxy_cache[url] = AuthServiceProxy(url)
+    return _rpc_proxy_cache[url]
 
 
 def setup_node():
@@ -71,7 +97,12 @@ def run_bitcoind():
     bitcoind = os.getenv("BITCOIND", "bitcoind")
 
     shutil.copy(os.path.join(os.path.dirname(__file__), "bitcoin.conf"), BITCOIN_DIRNAME)
-    subprocess.Popen([bitcoind, f"--datadir={BITCOIN_DIRNAME}"])
+    subprocess.Popen([
+        bitcoind,
+        f"--datadir={BITCOIN_DIRNAME}",
+        f"-rpcport={btc_rpc_port}",
+        f"-port={btc_p2p_port}",
+    ])
 
     # Make sure the node is ready, and generate some initial blocks
     setup_node()
@@ -94,6 +125,21 @@ def rpc_test_wallet(run_bitcoind):
     return get_wallet_rpc("test_wallet")
 
 
+@pytest.fixture(scope="session")
+def shared_watchonly_rpc(run_bitcoind) -> AuthServiceProxy:
+    """A single watch-only wallet shared by all the tests, in order to avoid the cost of
+    creating one bitcoin-core wallet per test. Each test imports its own (inactive)
+    descriptors in it, and must filter coins by address so that tests don't interfere."""
+
+    wallet_name = "shared_watchonly"
+    get_rpc().createwallet(
+        wallet_name=wallet_name,
+        disable_private_keys=True,
+        descriptors=True,
+    )
+    return get_wallet_rpc(wallet_name)
+
+
 def get_utxo():
     rpc = get_rpc()
     global utxos
@@ -153,6 +199,164 @@ def create_new_wallet() -> Tuple[str, str]:
     return wallet_name, core_xpub
 
 
+def _split_toplevel_args(s: str) -> List[str]:
+    """Splits a descriptor fragment on the commas that are not nested in () or {}."""
+    args = []
+    depth = 0
+    last = 0
+    for i, c in enumerate(s):
+        if c in "({":
+            depth += 1
+        elif c in ")}":
+            depth -= 1
+        elif c == "," and depth == 0:
+            args.append(s[last:i])
+            last = i + 1
+    args.append(s[last:])
+    return args
+
+
+def _derive_xonly_key(key_expr: str, index: int) -> bytes:
+    """Derives a descriptor key expression like [f/48'/1'/0']tpub.../0/* at the given
+    index, returning the x-only public key."""
+    if key_expr.startswith("["):
+        key_expr = key_expr[key_expr.index("]") + 1:]
+    xpub, *steps = key_expr.split("/")
+    path = [index if step == "*" else int(step) for step in steps]
+    pubkey = ExtendedKey.deserialize(xpub).derive_pub_path(path).pubkey
+    return pubkey[1:]  # drop the parity byte
+
+
+def _tapleaf_script(expr: str, index: int) -> bytes:
+    """Compiles a tapscript leaf expression (pk, multi_a or sortedmulti_a) to a script."""
+    func = expr[:expr.index("(")]
+    args = _split_toplevel_args(expr[expr.index("(") + 1:-1])
+
+    if func == "pk":
+        # <key> OP_CHECKSIG
+        return b"\x20" + _derive_xonly_key(args[0], index) + b"\xac"
+
+    if func in ("multi_a", "sortedmulti_a"):
+        k = int(args[0])
+        if not 1 <= k <= 16:
+            raise ValueError(f"Unsupported multi_a threshold: {k}")
+        keys = [_derive_xonly_key(arg, index) for arg in args[1:]]
+        if func == "sortedmulti_a":
+            keys.sort()
+        # <key_1> OP_CHECKSIG <key_2> OP_CHECKSIGADD ... <key_n> OP_CHECKSIGADD
+        # OP_k OP_NUMEQUAL, per BIP-387
+        script = b"\x20" + keys[0] + b"\xac"
+        for key in keys[1:]:
+            script += b"\x20" + key + b"\xba"
+        return script + bytes([0x50 + k]) + b"\x9c"
+
+    raise ValueError(f"Unsupported tapscript fragment: {func}")
+
+
+def _taptree_hash(expr: str, index: int) -> bytes:
+    """Computes the BIP-341 merkle root of a tr() descriptor's tree expression."""
+    if expr.startswith("{"):
+        left, right = _split_toplevel_args(expr[1:-1])
+        lh, rh = sorted([_taptree_hash(left, index), _taptree_hash(right, index)])
+        return tagged_hash("TapBranch", lh + rh)
+
+    script = _tapleaf_script(expr, index)
+    return tagged_hash("TapLeaf", b"\xc0" + ser_string(script))
+
+
+def derive_address(rpc: AuthServiceProxy, descriptor_chk: str, index: int) -> str:
+    """Derives the regtest address of a descriptor at the given index.
+
+    tr() descriptors (the only kind the tapscript tests use) are derived entirely
+    in-process, saving a deriveaddresses round trip per call; any other descriptor
+    falls back to bitcoin-core's deriveaddresses RPC."""
+    desc = descriptor_chk.split("#")[0]
+    if desc.startswith("tr(") and desc.endswith(")"):
+        args = _split_toplevel_args(desc[3:-1])
+        internal_key = _derive_xonly_key(args[0], index)
+        merkle_root = _taptree_hash(args[1], index) if len(args) > 1 else b""
+        _, output_key = taproot_tweak_pubkey(internal_key, merkle_root)
+        return segwit_addr.encode("bcrt", 1, output_key)
+
+    return rpc.deriveaddresses(descriptor_chk, [index, index])[0]
+
+
+@lru_cache(maxsize=None)
+def add_descriptor_checksum(desc: str) -> str:
+    """Appends the checksum to a descriptor, like bitcoin-core's getdescriptorinfo would.
+
+    Computing it locally (and memoizing per descriptor) avoids one RPC round trip per call."""
+    return AddChecksum(desc)
+
+
+@pytest.fixture(scope="session")
+def auto_miner(run_bitcoind):
+    """Mines one block every 200ms in the background for the whole session.
+
+    Tests that just need their transactions confirmed can wait for the next block
+    (see wait_for_confirmed_utxos) instead of each issuing its own generatetoaddress;
+    under pytest-xdist, transactions from several tests then share a block."""
+    stop = threading.Event()
+
+    # a dedicated proxy, as the cached ones must not be shared across threads
+    miner_rpc = AuthServiceProxy(rpc_url, parse_float=float)
+
+    def mine():
+        while not stop.wait(0.2):
+            miner_rpc.generatetoaddress(1, btc_addr)
+
+    miner = threading.Thread(target=mine, daemon=True)
+    miner.start()
+
+    yield
+
+    stop.set()
+    miner.join()
+
+
+def wait_for_confirmed_utxos(wallet_rpc: AuthServiceProxy, address: str, timeout: float = 15.0):
+    """Waits until the wallet sees at least one confirmed utxo on the given address
+    (mined by the auto_miner fixture), and returns the list of those utxos."""
+    rpc = get_rpc()
+    deadline = time() + timeout
+    while True:
+        utxos = wallet_rpc.listunspent(1, 9999999, [address])
+        if utxos:
+            return utxos
+        if time() >= deadline:
+            raise TimeoutError(f"No confirmed utxos on {address} after {timeout} seconds")
+        remaining_ms = max(1, int((deadline - time()) * 1000))
+        rpc.waitforblockheight(rpc.getblockcount() + 1, remaining_ms)
+
+
+def _xpub_pool_generator():
+    """Yields distinct xpubs (dropping the key origin information) harvested from
+    freshly created bitcoin-core wallets. Each wallet provides one descriptor per
+    script type with a distinct account-level xpub, so a single createwallet call
+    is amortized over several keys."""
+    while True:
+        wallet_name = get_unique_wallet_name()
+        get_rpc().createwallet(wallet_name=wallet_name, descriptors=True)
+
+        seen = set()
+        for d in get_wallet_rpc(wallet_name).listdescriptors()["descriptors"]:
+            desc: str = d["desc"]
+            if "/0/*" not in desc:
+                continue  # change descriptors reuse the receive descriptors' xpubs
+
+            xpub = desc[desc.index("]") + 1: desc.index("/0/*")]
+            if xpub not in seen:
+                seen.add(xpub)
+                yield xpub
+
+
+@pytest.fixture(scope="session")
+def xpub_pool(run_bitcoind):
+    """Session-wide pool of foreign xpubs, for tests that need extra keys but not a
+    wallet able to sign for them; cheaper than one create_new_wallet() call per key."""
+    return _xpub_pool_generator()
+
+
 def generate_blocks(n):
     return get_rpc().generatetoaddress(n, btc_addr)
 
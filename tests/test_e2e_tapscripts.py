@@ -1,6 +1,7 @@
 import pytest
 
-from typing import List, Union
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Union
 
 import hmac
 from hashlib import sha256
@@ -17,18 +18,18 @@ from test_utils import SpeculosGlobals, get_internal_xpub, count_internal_keys
 from speculos.client import SpeculosClient
 from test_utils.speculos import automation
 
-from .conftest import create_new_wallet, generate_blocks, get_unique_wallet_name, get_wallet_rpc, testnet_to_regtest_addr as T
+from .conftest import add_descriptor_checksum, create_new_wallet, derive_address, get_wallet_rpc, wait_for_confirmed_utxos, testnet_to_regtest_addr as T
 from .conftest import AuthServiceProxy
 
 
-def run_test_e2e(wallet_policy: WalletPolicy, core_wallet_names: List[str], rpc: AuthServiceProxy, rpc_test_wallet: AuthServiceProxy, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
+def run_test_e2e(wallet_policy: WalletPolicy, core_wallet_names: List[str], rpc: AuthServiceProxy, rpc_test_wallet: AuthServiceProxy, shared_watchonly_rpc: AuthServiceProxy, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
     with automation(comm, "automations/register_wallet_accept.json"):
         wallet_id, wallet_hmac = client.register_wallet(wallet_policy)
 
     assert wallet_id == wallet_policy.id
 
     assert hmac.compare_digest(
-        hmac.new(speculos_globals.wallet_registration_key, wallet_id, sha256).digest(),
+        hmac.digest(speculos_globals.wallet_registration_key, wallet_id, sha256),
         wallet_hmac,
     )
 
@@ -36,55 +37,52 @@ def run_test_e2e(wallet_policy: WalletPolicy, core_wallet_names: List[str], rpc:
 
     # ==> verify the address matches what bitcoin-core computes
     receive_descriptor = wallet_policy.get_descriptor(change=False)
-    receive_descriptor_info = rpc.getdescriptorinfo(receive_descriptor)
-    # bitcoin-core adds the checksum, and requires it for other calls
-    receive_descriptor_chk = receive_descriptor_info["descriptor"]
-    address_core = rpc.deriveaddresses(receive_descriptor_chk, [3, 3])[0]
+    # bitcoin-core requires the checksum for other calls; computed locally to save a round trip
+    receive_descriptor_chk = add_descriptor_checksum(receive_descriptor)
+    address_core = derive_address(rpc, receive_descriptor_chk, 3)
 
     assert T(address_hww) == address_core
 
     # also get the change descriptor for later
     change_descriptor = wallet_policy.get_descriptor(change=True)
-    change_descriptor_info = rpc.getdescriptorinfo(change_descriptor)
-    change_descriptor_chk = change_descriptor_info["descriptor"]
+    change_descriptor_chk = add_descriptor_checksum(change_descriptor)
 
     # ==> import wallet in bitcoin-core
 
-    multisig_wallet_name = get_unique_wallet_name()
-    rpc.createwallet(
-        wallet_name=multisig_wallet_name,
-        disable_private_keys=True,
-        descriptors=True,
-    )
-    multisig_rpc = get_wallet_rpc(multisig_wallet_name)
-    multisig_rpc.importdescriptors([{
+    # the wallet is shared across tests, so the descriptors are imported as inactive;
+    # coins and change must be tracked per-address rather than with the wallet-wide RPCs
+    shared_watchonly_rpc.importdescriptors([{
         "desc": receive_descriptor_chk,
-        "active": True,
-        "internal": False,
         "timestamp": "now"
     }, {
         "desc": change_descriptor_chk,
-        "active": True,
-        "internal": True,
         "timestamp": "now"
     }])
 
-    # ==> fund the multisig wallet and get prevout info
+    # ==> fund the wallet and get prevout info
 
     rpc_test_wallet.sendtoaddress(T(address_hww), "0.1")
-    generate_blocks(1)
 
-    assert multisig_rpc.getwalletinfo()["balance"] == Decimal("0.1")
+    # the background miner (auto_miner fixture) confirms the transaction; the address is
+    # unique to this test, so filtering by it keeps the scan cheap in the shared wallet
+    utxos = wait_for_confirmed_utxos(shared_watchonly_rpc, T(address_hww))
+    assert [u["amount"] for u in utxos] == [Decimal("0.1")]
 
     # ==> prepare a psbt spending from the wallet
 
     out_address = rpc_test_wallet.getnewaddress()
+    change_address = derive_address(rpc, change_descriptor_chk, 0)
 
-    result = multisig_rpc.walletcreatefundedpsbt(
+    result = shared_watchonly_rpc.walletcreatefundedpsbt(
+        inputs=[{"txid": u["txid"], "vout": u["vout"]} for u in utxos],
         outputs={
             out_address: Decimal("0.01")
         },
         options={
+            # only spend this test's coins, and send change to this test's change descriptor,
+            # as the shared wallet has no active descriptors and contains other tests' coins
+            "add_inputs": False,
+            "changeAddress": change_address,
             # make sure that the fee is large enough; it looks like
             # fee estimation doesn't work in core with miniscript, yet
             "fee_rate": 10
@@ -100,14 +98,23 @@ def run_test_e2e(wallet_policy: WalletPolicy, core_wallet_names: List[str], rpc:
     with automation(comm, "automations/sign_with_wallet_accept.json"):
         hww_sigs = client.sign_psbt(psbt, wallet_policy, wallet_hmac)
 
-    # only correct for taproot policies
+    # only correct for taproot policies.
+    # partition the signatures per input first, then attach them with a single bulk
+    # dict update per input rather than one insertion (and possible rehash) per signature
+    script_sigs_per_input: Dict[int, Dict[Tuple[bytes, bytes], bytes]] = defaultdict(dict)
+    key_sig_per_input: Dict[int, bytes] = {}
     for i, part_sig in hww_sigs:
         if part_sig.tapleaf_hash is not None:
             # signature for a script spend
-            psbt.inputs[i].tap_script_sigs[(part_sig.pubkey, part_sig.tapleaf_hash)] = part_sig.signature
+            script_sigs_per_input[i][(part_sig.pubkey, part_sig.tapleaf_hash)] = part_sig.signature
         else:
             # key path spend
-            psbt.inputs[i].tap_key_sig = part_sig.signature
+            key_sig_per_input[i] = part_sig.signature
+
+    for i, script_sigs in script_sigs_per_input.items():
+        psbt.inputs[i].tap_script_sigs.update(script_sigs)
+    for i, sig in key_sig_per_input.items():
+        psbt.inputs[i].tap_key_sig = sig
 
     signed_psbt_hww_b64 = psbt.serialize()
 
@@ -116,14 +123,15 @@ def run_test_e2e(wallet_policy: WalletPolicy, core_wallet_names: List[str], rpc:
 
     # ==> sign it with bitcoin-core
 
-    partial_psbts = [signed_psbt_hww_b64]
+    # each signer processes the accumulated psbt (starting from the hww-signed one),
+    # so the signatures pile up as we go and no separate combinepsbt call is needed
+    signed_psbt_b64 = signed_psbt_hww_b64
     for core_wallet_name in core_wallet_names:
-        partial_psbt_response = get_wallet_rpc(core_wallet_name).walletprocesspsbt(psbt_b64)
-        partial_psbts.append(partial_psbt_response["psbt"])
+        partial_psbt_response = get_wallet_rpc(core_wallet_name).walletprocesspsbt(signed_psbt_b64)
+        signed_psbt_b64 = partial_psbt_response["psbt"]
 
     # ==> finalize the psbt, extract tx and broadcast
-    combined_psbt = rpc.combinepsbt(partial_psbts)
-    result = rpc.finalizepsbt(combined_psbt)
+    result = rpc.finalizepsbt(signed_psbt_b64)
 
     assert result["complete"] == True
     rawtx = result["hex"]
@@ -142,111 +150,54 @@ def run_test_invalid(client: Client, descriptor_template: str, keys_info: List[s
         client.register_wallet(wallet_policy)
 
 
-def test_e2e_tapscript_one_of_two_keypath(rpc, rpc_test_wallet, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
-    # One of two keys, with the foreign key in the key path spend
-    # tr(my_key,pk(foreign_key_1))
-
-    path = "499'/1'/0'"
-    _, core_xpub_orig = create_new_wallet()
-    internal_xpub = get_internal_xpub(speculos_globals.seed, path)
-    wallet_policy = WalletPolicy(
-        name="Tapscript 1-of-2",
-        descriptor_template="tr(@0/**,pk(@1/**))",
-        keys_info=[
-            f"[{speculos_globals.master_key_fingerprint.hex()}/{path}]{internal_xpub}",
-            f"{core_xpub_orig}",
-        ])
-
-    run_test_e2e(wallet_policy, [], rpc, rpc_test_wallet, client, speculos_globals, comm)
-
-
-def test_e2e_tapscript_one_of_two_scriptpath(rpc, rpc_test_wallet, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
-    # One of two keys, with the foreign key in the key path spend
-    # tr(foreign_key,pk(my_key))
-
-    path = "499'/1'/0'"
-    _, core_xpub_orig = create_new_wallet()
-    internal_xpub = get_internal_xpub(speculos_globals.seed, path)
-    wallet_policy = WalletPolicy(
-        name="Tapscript 1-of-2",
-        descriptor_template="tr(@0/**,pk(@1/**))",
-        keys_info=[
-            f"{core_xpub_orig}",
-            f"[{speculos_globals.master_key_fingerprint.hex()}/{path}]{internal_xpub}",
-        ])
-
-    run_test_e2e(wallet_policy, [], rpc, rpc_test_wallet, client, speculos_globals, comm)
-
-
-def test_e2e_tapscript_one_of_three_keypath(rpc, rpc_test_wallet, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
+@pytest.mark.parametrize("name,descriptor_template,internal_key_slot,n_keys,core_signer_slot", [
+    # One of two keys, with the internal key in the key path spend
+    ("Tapscript 1-of-2", "tr(@0/**,pk(@1/**))", 0, 2, None),
+    # One of two keys, with the internal key in the script path spend
+    ("Tapscript 1-of-2", "tr(@0/**,pk(@1/**))", 1, 2, None),
     # One of three keys, with the internal one in the key-path spend
-    # tr(my_key,{pk(foreign_key_1,foreign_key_2)})
+    ("Tapscript 1-of-3", "tr(@0/**,{pk(@1/**),pk(@2/**)})", 0, 3, None),
+    # One of three keys, with the internal one in one of the scripts
+    ("Tapscript 1-of-3", "tr(@0/**,{pk(@1/**),pk(@2/**)})", 1, 3, None),
+    # tr(foreign_key_1,multi_a(2,my_key,foreign_key_2)), with foreign_key_2 also signing
+    ("Tapscript 1 or 2-of-2", "tr(@0/**,multi_a(2,@1/**,@2/**))", 1, 3, 2),
+], ids=["one_of_two_keypath", "one_of_two_scriptpath", "one_of_three_keypath", "one_of_three_scriptpath", "sortedmulti_a_2of2"])
+@pytest.mark.usefixtures("auto_miner")
+def test_e2e_tapscript(name: str, descriptor_template: str, internal_key_slot: int, n_keys: int, core_signer_slot: Optional[int], rpc, rpc_test_wallet, shared_watchonly_rpc, xpub_pool, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
+    # These policies only differ in the descriptor template, in the slot of the internal
+    # key, and in whether one of the foreign keys also signs with bitcoin-core; a single
+    # parametrized test lets pytest collect them once and share fixtures across variants.
 
     path = "499'/1'/0'"
-    _, core_xpub_orig_1 = create_new_wallet()
-    _, core_xpub_orig_2 = create_new_wallet()
     internal_xpub = get_internal_xpub(speculos_globals.seed, path)
-    wallet_policy = WalletPolicy(
-        name="Tapscript 1-of-3",
-        descriptor_template="tr(@0/**,{pk(@1/**),pk(@2/**)})",
-        keys_info=[
-            f"[{speculos_globals.master_key_fingerprint.hex()}/{path}]{internal_xpub}",
-            f"{core_xpub_orig_1}",
-            f"{core_xpub_orig_2}",
-        ])
-
-    run_test_e2e(wallet_policy, [],
-                 rpc, rpc_test_wallet, client, speculos_globals, comm)
 
+    keys_info = []
+    core_wallet_names = []
+    for slot in range(n_keys):
+        if slot == internal_key_slot:
+            keys_info.append(f"[{speculos_globals.master_key_fingerprint.hex()}/{path}]{internal_xpub}")
+        elif slot == core_signer_slot:
+            # this foreign key signs with bitcoin-core later, so it needs its own wallet
+            core_wallet_name, core_xpub_orig = create_new_wallet()
+            core_wallet_names.append(core_wallet_name)
+            keys_info.append(core_xpub_orig)
+        else:
+            keys_info.append(next(xpub_pool))
 
-def test_e2e_tapscript_one_of_three_scriptpath(rpc, rpc_test_wallet, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
-    # One of three keys, with the internal one in on of the scripts
-    # tr(foreign_key_1,{pk(my_key,foreign_key_2)})
-
-    path = "499'/1'/0'"
-    _, core_xpub_orig_1 = create_new_wallet()
-    _, core_xpub_orig_2 = create_new_wallet()
-    internal_xpub = get_internal_xpub(speculos_globals.seed, path)
-    wallet_policy = WalletPolicy(
-        name="Tapscript 1-of-3",
-        descriptor_template="tr(@0/**,{pk(@1/**),pk(@2/**)})",
-        keys_info=[
-            f"{core_xpub_orig_1}",
-            f"[{speculos_globals.master_key_fingerprint.hex()}/{path}]{internal_xpub}",
-            f"{core_xpub_orig_2}",
-        ])
-
-    run_test_e2e(wallet_policy, [],
-                 rpc, rpc_test_wallet, client, speculos_globals, comm)
-
-
-def test_e2e_tapscript_sortedmulti_a_2of2(rpc, rpc_test_wallet, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
-    # tr(foreign_key_1,sortedmulti_a(2,my_key,foreign_key_2))
-
-    path = "499'/1'/0'"
-    _, core_xpub_orig_1 = create_new_wallet()
-    core_wallet_name2, core_xpub_orig_2 = create_new_wallet()
-    internal_xpub = get_internal_xpub(speculos_globals.seed, path)
     wallet_policy = WalletPolicy(
-        name="Tapscript 1 or 2-of-2",
-        descriptor_template="tr(@0/**,multi_a(2,@1/**,@2/**))",
-        keys_info=[
-            f"{core_xpub_orig_1}",
-            f"[{speculos_globals.master_key_fingerprint.hex()}/{path}]{internal_xpub}",
-            f"{core_xpub_orig_2}",
-        ])
+        name=name,
+        descriptor_template=descriptor_template,
+        keys_info=keys_info)
 
-    run_test_e2e(wallet_policy, [core_wallet_name2],
-                 rpc, rpc_test_wallet, client, speculos_globals, comm)
+    run_test_e2e(wallet_policy, core_wallet_names,
+                 rpc, rpc_test_wallet, shared_watchonly_rpc, client, speculos_globals, comm)
 
 
-def test_e2e_tapscript_depth4(rpc, rpc_test_wallet, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
+@pytest.mark.usefixtures("auto_miner")
+def test_e2e_tapscript_depth4(rpc, rpc_test_wallet, shared_watchonly_rpc, xpub_pool, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient]):
     # A taproot tree with maximum supported depth, where the internal key is in the deepest script
 
-    keys_info = []
-    for _ in range(4):
-        _, core_xpub_orig = create_new_wallet()
-        keys_info.append(core_xpub_orig)
+    keys_info = [next(xpub_pool) for _ in range(4)]
 
     path = "499'/1'/0'"
     internal_xpub = get_internal_xpub(speculos_globals.seed, path)
@@ -257,10 +208,11 @@ def test_e2e_tapscript_depth4(rpc, rpc_test_wallet, client: Client, speculos_glo
         descriptor_template="tr(@0/**,{pk(@1/**),{pk(@2/**),{pk(@3/**),pk(@4/**)}}})",
         keys_info=keys_info)
 
-    run_test_e2e(wallet_policy, [], rpc, rpc_test_wallet, client, speculos_globals, comm)
+    run_test_e2e(wallet_policy, [], rpc, rpc_test_wallet, shared_watchonly_rpc, client, speculos_globals, comm)
 
 
-def test_e2e_tapscript_large(rpc, rpc_test_wallet, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient], model):
+@pytest.mark.usefixtures("auto_miner")
+def test_e2e_tapscript_large(rpc, rpc_test_wallet, shared_watchonly_rpc, xpub_pool, client: Client, speculos_globals: SpeculosGlobals, comm: Union[TransportClient, SpeculosClient], model):
     # A quite large tapscript with 8 tapleaves and 22 keys in total.
 
     # Takes more memory than Nano S can handle
@@ -271,10 +223,11 @@ def test_e2e_tapscript_large(rpc, rpc_test_wallet, client: Client, speculos_glob
 
     core_wallet_name = None
     for i in range(21):
-        core_wallet_name_i, core_xpub_orig = create_new_wallet()
         if i == 9:
             # sign with bitcoin-core using the ninth external key (it will be key @10 in the policy)
-            core_wallet_name = core_wallet_name_i
+            core_wallet_name, core_xpub_orig = create_new_wallet()
+        else:
+            core_xpub_orig = next(xpub_pool)
         keys_info.append(core_xpub_orig)
 
     path = "499'/1'/0'"
@@ -288,4 +241,4 @@ def test_e2e_tapscript_large(rpc, rpc_test_wallet, client: Client, speculos_glob
         descriptor_template="tr(@0/**,{{{sortedmulti_a(1,@1/**,@2/**,@3/**,@4/**,@5/**),multi_a(2,@6/**,@7/**,@8/**)},{multi_a(2,@9/**,@10/**,@11/**,@12/**),pk(@13/**)}},{{multi_a(2,@14/**,@15/**),multi_a(3,@16/**,@17/**,@18/**)},{multi_a(2,@19/**,@20/**),pk(@21/**)}}})",
         keys_info=keys_info)
 
-    run_test_e2e(wallet_policy, [core_wallet_name], rpc, rpc_test_wallet, client, speculos_globals, comm)
+    run_test_e2e(wallet_policy, [core_wallet_name], rpc, rpc_test_wallet, shared_watchonly_rpc, client, speculos_globals, comm)